@@ -12,19 +12,34 @@ Flow:
 4. Return formatted response
 """
 
+import codecs
+import copy
+import functools
+import hashlib
 import json
 import os
 import re
 import tempfile
+import textwrap
 import subprocess
+import threading
 import logging
 import uuid
 import time
 import random
 import math
+from collections import OrderedDict
+from multiprocessing import TimeoutError as multiprocessing_TimeoutError
 from typing import Dict, Any, Optional
+import numpy as np
+import orjson
 import pandas as pd
-from .llm_client import call_llm
+
+try:  # optional Rust JSON parser; interns repeated keys from LLM output
+    import jiter
+except ImportError:
+    jiter = None
+from .llm_client import call_llm, call_llm_stream
 from .rl import ThompsonBandit, Arm
 
 # Configure module logger
@@ -32,6 +47,13 @@ logger = logging.getLogger(__name__)
 
 # Configuration from environment
 CODE_EXECUTION_TIMEOUT = int(os.getenv("CODE_EXECUTION_TIMEOUT", "15"))
+# "inprocess" executes generated transformations in this process (no interpreter
+# startup / pandas re-import / CSV round trip); "subprocess" keeps the isolated
+# child-interpreter path for deployments that want process-level sandboxing.
+CODE_EXECUTION_MODE = os.getenv("CODE_EXECUTION_MODE", "inprocess").strip().lower()
+# Worker pool size for subprocess mode; workers keep pandas imported across
+# requests instead of paying interpreter startup per chart. 0 = spawn per request.
+WORKER_POOL_SIZE = int(os.getenv("WORKER_POOL", "4"))
 MAX_CHART_ITEMS = int(os.getenv("MAX_CHART_ITEMS", "15"))
 MAX_LLM_TOKENS = int(os.getenv("MAX_LLM_TOKENS", "4096"))
 
@@ -39,10 +61,36 @@ MAX_LLM_TOKENS = int(os.getenv("MAX_LLM_TOKENS", "4096"))
 MAX_SCHEMA_COLUMNS = int(os.getenv("MAX_SCHEMA_COLUMNS", "40"))
 MAX_SAMPLE_ROWS = int(os.getenv("MAX_SAMPLE_ROWS", "3"))
 
+# LLM response cache: repeated/near-identical requests skip the Gemini round trip
+# entirely (the dominant latency + cost in this module). Keyed on normalized user
+# text + dataset schema fingerprint + history, so any data/schema change misses.
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "0"))  # seconds; 0 = no expiry
+
+# Stream Gemini responses chunk-by-chunk instead of blocking on the full text.
+# The intent field arrives in the first chunks, so it can be surfaced (logged,
+# and available for future early-branching) seconds before generation finishes.
+LLM_STREAMING = os.getenv("LLM_STREAMING", "0").strip().lower() in ("1", "true", "yes")
+
 # Optional retries (disabled by default to avoid extra cost)
 LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "0"))  # retries on transient LLM errors
 LLM_JSON_REPAIR_MAX = int(os.getenv("LLM_JSON_REPAIR_MAX", "0"))  # retries when model returns invalid JSON
 
+# Local admission control for Gemini: cap in-flight calls and (optionally)
+# calls per minute so burst load queues here instead of bouncing off the API
+# quota as 429s and retry storms. 0 disables either mechanism.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_RATE_LIMIT_PER_MIN = float(os.getenv("LLM_RATE_LIMIT_PER_MIN", "0"))
+# When the concurrency gate is contended, skip transient-error retries: under
+# saturation a retry only amplifies the backlog.
+LLM_DISABLE_RETRIES_WHEN_BUSY = os.getenv("LLM_DISABLE_RETRIES_WHEN_BUSY", "0").strip().lower() in ("1", "true", "yes")
+
+# Fire the strict-JSON repair call concurrently with the primary call instead
+# of only after a parse failure. Costs an extra Gemini call per request when
+# enabled, but turns the invalid-JSON worst case from two sequential round
+# trips into max() of two overlapped ones. Only meaningful with repair on.
+LLM_SPECULATIVE_REPAIR = os.getenv("LLM_SPECULATIVE_REPAIR", "0").strip().lower() in ("1", "true", "yes")
+
 # Prompt file paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 UNIFIED_PROMPT_PATH = os.path.join(BASE_DIR, "prompts", "unified_system.txt")
@@ -52,19 +100,22 @@ UNIFIED_STRICT_SUFFIX_PATH = os.path.join(BASE_DIR, "prompts", "unified_strict_j
 _BANDIT_STATE_PATH = os.path.join(BASE_DIR, "runs", "rl_state.json")
 _BANDIT = ThompsonBandit(state_path=_BANDIT_STATE_PATH)
 
+# Default model, read once (env is fixed for the process lifetime).
+_DEFAULT_GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
 # Arms are prompt/parameter variants; avoid additional prompt files by varying constraints/temperature.
 _UNIFIED_ARMS = [
     Arm(
         arm_id="unified_base",
         stage="unified",
-        model_name=os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
+        model_name=_DEFAULT_GEMINI_MODEL,
         notes="Base unified prompt",
         temperature=0.1,
     ),
     Arm(
         arm_id="unified_strict_json",
         stage="unified",
-        model_name=os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
+        model_name=_DEFAULT_GEMINI_MODEL,
         notes="Stricter JSON-only response",
         temperature=0.05,
     ),
@@ -75,16 +126,90 @@ _BANDIT.ensure_arms(_UNIFIED_ARMS)
 _PROFILE_REPORTS_DIR = os.path.join(BASE_DIR, "runs", "profiles")
 _PROFILE_STORAGE = os.getenv("PROFILE_STORAGE", "local").strip().lower()
 _CLOUDINARY_PROFILE_FOLDER = os.getenv("CLOUDINARY_PROFILE_FOLDER", "capstone-profiles").strip() or "capstone-profiles"
+# Cloudinary credentials, frozen at import like the folder above (secrets are
+# provided via environment, which does not change mid-process).
+_CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
+_CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
+_CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
+
+
+# Profiling cost scales linearly with rows; frames above the threshold are
+# subsampled before the report is built. Generation itself runs on a worker
+# process so the multi-second (sometimes multi-minute) GIL-bound render does
+# not stall every other request in this service.
+PROFILE_SAMPLE_THRESHOLD = int(os.getenv("PROFILE_SAMPLE_THRESHOLD", "50000"))
+PROFILE_SAMPLE_ROWS = int(os.getenv("PROFILE_SAMPLE_ROWS", "50000"))
+PROFILE_EXECUTOR_WORKERS = int(os.getenv("PROFILE_EXECUTOR_WORKERS", "1"))
+
+_PROFILE_EXECUTOR = None
+_PROFILE_EXECUTOR_LOCK = threading.Lock()
+
+
+# Total on-disk budget for cached profile reports (MB); oldest evicted first.
+_PROFILE_CACHE_MAX_MB = int(os.getenv("PROFILE_CACHE_MAX_MB", "512"))
 
 
 def _generate_profile_report_id() -> str:
     return str(uuid.uuid4())
 
 
+def _evict_old_profile_reports() -> None:
+    """Keep the reports dir under _PROFILE_CACHE_MAX_MB (LRU by mtime)."""
+    if _PROFILE_CACHE_MAX_MB <= 0 or not os.path.isdir(_PROFILE_REPORTS_DIR):
+        return
+    try:
+        entries = []
+        with os.scandir(_PROFILE_REPORTS_DIR) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".html"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        budget = _PROFILE_CACHE_MAX_MB * (1 << 20)
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= budget:
+                break
+            os.unlink(path)
+            total -= size
+    except Exception:
+        logger.warning("profile.evict_failed", exc_info=True)
+
+
+def _get_profile_executor():
+    global _PROFILE_EXECUTOR
+    if _PROFILE_EXECUTOR is None:
+        with _PROFILE_EXECUTOR_LOCK:
+            if _PROFILE_EXECUTOR is None:
+                from concurrent.futures import ProcessPoolExecutor
+                import multiprocessing
+
+                _PROFILE_EXECUTOR = ProcessPoolExecutor(
+                    max_workers=PROFILE_EXECUTOR_WORKERS,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+    return _PROFILE_EXECUTOR
+
+
+def _profile_report_worker(df: pd.DataFrame, out_path: str) -> str:
+    """Build and write the report; runs on a ProcessPoolExecutor worker."""
+    from ydata_profiling import ProfileReport
+
+    # Keep the report reasonably lightweight for chat embedding.
+    report = ProfileReport(
+        df,
+        title="YData Profiling Report",
+        minimal=True,
+        explorative=True,
+        progress_bar=False,
+    )
+    report.to_file(out_path)
+    return out_path
+
+
 def _generate_profile_report_html_to_disk(df: pd.DataFrame, report_id: str) -> str:
     """Generate a ydata-profiling HTML report and write it to disk. Returns file path."""
     try:
-        from ydata_profiling import ProfileReport
+        from ydata_profiling import ProfileReport  # noqa: F401
     except Exception as e:
         import sys
         py_ver = f"{sys.version_info.major}.{sys.version_info.minor}"
@@ -99,17 +224,22 @@ def _generate_profile_report_html_to_disk(df: pd.DataFrame, report_id: str) -> s
     safe_name = f"{report_id}.html"
     out_path = os.path.join(_PROFILE_REPORTS_DIR, safe_name)
 
-    # Keep the report reasonably lightweight for chat embedding.
-    report = ProfileReport(
-        df,
-        title="YData Profiling Report",
-        minimal=True,
-        explorative=True,
-        progress_bar=False,
-    )
+    # Subsample very large frames; the profiler's per-column compute is linear
+    # in rows and the report is statistical anyway.
+    if PROFILE_SAMPLE_THRESHOLD > 0 and len(df) > PROFILE_SAMPLE_THRESHOLD:
+        logger.info(
+            "profile.sampling rows=%d -> %d report_id=%s",
+            len(df), PROFILE_SAMPLE_ROWS, report_id,
+        )
+        df = df.sample(n=min(PROFILE_SAMPLE_ROWS, len(df)), random_state=0)
 
-    report.to_file(out_path)
-    return out_path
+    try:
+        future = _get_profile_executor().submit(_profile_report_worker, df, out_path)
+        return future.result()
+    except Exception:
+        # Worker pool unavailable (or frame not picklable): render inline.
+        logger.warning("profile.executor_fallback report_id=%s", report_id, exc_info=True)
+        return _profile_report_worker(df, out_path)
 
 
 def _upload_profile_report_to_cloudinary(html_path: str) -> str:
@@ -126,9 +256,9 @@ def _upload_profile_report_to_cloudinary(html_path: str) -> str:
     Optional:
       - CLOUDINARY_PROFILE_FOLDER
     """
-    cloud_name = os.getenv("CLOUDINARY_CLOUD_NAME")
-    api_key = os.getenv("CLOUDINARY_API_KEY")
-    api_secret = os.getenv("CLOUDINARY_API_SECRET")
+    cloud_name = _CLOUDINARY_CLOUD_NAME
+    api_key = _CLOUDINARY_API_KEY
+    api_secret = _CLOUDINARY_API_SECRET
     if not cloud_name or not api_key or not api_secret:
         raise RuntimeError("Cloudinary env vars missing (CLOUDINARY_CLOUD_NAME/API_KEY/API_SECRET)")
 
@@ -165,73 +295,166 @@ def _upload_profile_report_to_cloudinary(html_path: str) -> str:
     return str(url)
 
 
+def _build_llm_cache():
+    if LLM_CACHE_SIZE <= 0:
+        return None
+    from cachetools import LRUCache, TTLCache
+    if LLM_CACHE_TTL > 0:
+        return TTLCache(maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL)
+    return LRUCache(maxsize=LLM_CACHE_SIZE)
+
+
+# cachetools caches are not thread-safe (eviction and TTL expiry are
+# multi-step Python loops) and analyze() runs concurrently on threadpool
+# workers, so every get/set below holds the cache's lock.
+_LLM_CACHE = _build_llm_cache()
+_LLM_CACHE_LOCK = threading.Lock()
+
+# Second, lower tier keyed on the exact rendered prompts: catches repeats that
+# the parsed-result cache misses (e.g. a different history summary that still
+# renders the same prompt, or callers bypassing analyze()).
+_LLM_RESPONSE_CACHE = _build_llm_cache()
+_LLM_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
+def _llm_response_cache_key(
+    system_prompt: str, user_prompt: str, model_name: str, temperature: float
+) -> str:
+    raw = "\x00".join((system_prompt, user_prompt, model_name or "", f"{temperature}"))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _schema_fingerprint(dfs: Dict[str, pd.DataFrame]) -> str:
+    """Stable fingerprint of dataset names, columns, and dtypes."""
+    spec = sorted(
+        (name, tuple(map(str, df.columns)), tuple(map(str, df.dtypes)))
+        for name, df in dfs.items()
+    )
+    return hashlib.blake2b(repr(spec).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _llm_cache_key(user_text: str, dfs: Dict[str, pd.DataFrame], history_summary: str) -> str:
+    raw = "\x00".join((user_text.strip().lower(), _schema_fingerprint(dfs), history_summary))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
 def update_bandit_feedback(arm_id: str, reward: int):
     return _BANDIT.update(arm_id, reward)
 
 
+_PROMPT_CACHE: Dict[str, tuple] = {}
+
+
 def _read_prompt(path: str) -> str:
-    """Read a prompt text file."""
+    """Read a prompt text file, cached by mtime.
+
+    A stat() per request instead of a full read; prompt edits on disk are
+    picked up without a restart.
+    """
+    st_mtime = os.stat(path).st_mtime
+    cached = _PROMPT_CACHE.get(path)
+    if cached is not None and cached[0] == st_mtime:
+        return cached[1]
     with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+        text = f.read()
+    _PROMPT_CACHE[path] = (st_mtime, text)
+    return text
+
+
+# Pre-warm the prompt cache so first-request latency excludes disk I/O.
+for _p in (UNIFIED_PROMPT_PATH, UNIFIED_STRICT_SUFFIX_PATH):
+    try:
+        _read_prompt(_p)
+    except FileNotFoundError:
+        logger.warning("Prompt file missing at import: %s", _p)
+
+
+# Precompiled at module scope so the hot path skips re's internal pattern cache.
+_JSON_FENCE_RE = re.compile(r"```json\s*([\s\S]*?)\s*```", re.IGNORECASE)
+_FENCE_STRIP_RE = re.compile(r"```\w*\s*")
+_JSON_OBJ_RE = re.compile(r"\{.*\}", re.DOTALL)
 
 
 def _extract_unified_response(text: str) -> Dict[str, Any]:
     """
     Extract JSON object from unified LLM response.
     Handles markdown code blocks and raw JSON with nested braces.
+
+    Fast path: one regex grab of the outermost {...} span parsed by orjson (C).
+    Falls back to json.JSONDecoder.raw_decode only when that fails (e.g.
+    trailing junk containing an unmatched brace): the stdlib's C scanner
+    parses the first complete object and ignores whatever follows it.
     """
     text = text.strip()
-    
+
     # Remove markdown code blocks if present
     if "```" in text:
         # Try to find JSON block first
-        match = re.search(r"```json\s*([\s\S]*?)\s*```", text, re.IGNORECASE)
+        match = _JSON_FENCE_RE.search(text)
         if match:
             text = match.group(1).strip()
         else:
             # Fallback: remove all fences
-            text = re.sub(r"```\w*\s*", "", text)
+            text = _FENCE_STRIP_RE.sub("", text)
             text = text.replace("```", "")
-    
-    # Find the outermost JSON object by matching braces
+
+    # Fast path: greedy outermost-braces span + native parser. jiter when
+    # installed (SIMD parse, interns the repeated schema keys Gemini emits),
+    # otherwise orjson.
+    match = _JSON_OBJ_RE.search(text)
+    if match:
+        if jiter is not None:
+            try:
+                parsed = jiter.from_json(match.group(0).encode("utf-8"), cache_mode="keys")
+                if isinstance(parsed, dict):
+                    return parsed
+            except Exception:
+                pass
+        try:
+            parsed = orjson.loads(match.group(0))
+            if isinstance(parsed, dict):
+                return parsed
+        except orjson.JSONDecodeError:
+            pass
+
     start = text.find("{")
     if start == -1:
         raise json.JSONDecodeError("No JSON object found", text, 0)
-    
-    # Count braces to find matching closing brace
-    # Must properly handle escape sequences within strings
-    depth = 0
-    in_string = False
-    i = start
-    end = -1
-    
-    while i < len(text):
-        char = text[i]
-        
-        if in_string:
-            if char == '\\' and i + 1 < len(text):
-                # Skip the next character (it's escaped)
-                i += 2
-                continue
-            elif char == '"':
-                in_string = False
-        else:
-            if char == '"':
-                in_string = True
-            elif char == '{':
-                depth += 1
-            elif char == '}':
-                depth -= 1
-                if depth == 0:
-                    end = i
-                    break
-        i += 1
-    
-    if end == -1:
-        raise json.JSONDecodeError("Unmatched braces in JSON", text, start)
-    
-    json_str = text[start:end + 1]
-    return json.loads(json_str)
+
+    parsed, _end = json.JSONDecoder().raw_decode(text, start)
+    if not isinstance(parsed, dict):
+        raise json.JSONDecodeError("Top-level JSON value is not an object", text, start)
+    return parsed
+
+
+# Formatted dataset summaries are identical across chat turns as long as the
+# data is unchanged, so cache them per (name, content fingerprint).
+_DATASET_INFO_CACHE_SIZE = int(os.getenv("DATASET_INFO_CACHE_SIZE", "64"))
+# Frames above this cell count skip fingerprinting (hashing would cost more
+# than it saves relative to the summary passes).
+_DATASET_FINGERPRINT_MAX_CELLS = int(os.getenv("DATASET_FINGERPRINT_MAX_CELLS", "2000000"))
+
+_DATASET_INFO_CACHE = None
+if _DATASET_INFO_CACHE_SIZE > 0:
+    from cachetools import LRUCache as _LRUCache
+
+    _DATASET_INFO_CACHE = _LRUCache(maxsize=_DATASET_INFO_CACHE_SIZE)
+# LRUCache eviction is not thread-safe; concurrent analyze() calls hit this
+# cache simultaneously, so get/set go through the lock.
+_DATASET_INFO_CACHE_LOCK = threading.Lock()
+
+
+def _df_fingerprint(df: pd.DataFrame) -> Optional[str]:
+    """Cheap content fingerprint of a DataFrame; None when hashing isn't worth it."""
+    if df.size > _DATASET_FINGERPRINT_MAX_CELLS:
+        return None
+    try:
+        row_hashes = pd.util.hash_pandas_object(df, index=False)
+        h = hashlib.blake2b(row_hashes.values.tobytes(), digest_size=16)
+        h.update(",".join(map(str, df.columns)).encode("utf-8", "replace"))
+        return h.hexdigest()
+    except Exception:
+        return None
 
 
 def _format_datasets_info(dfs: Dict[str, pd.DataFrame]) -> str:
@@ -239,73 +462,119 @@ def _format_datasets_info(dfs: Dict[str, pd.DataFrame]) -> str:
     Format ALL datasets into a comprehensive string for LLM context.
     Includes: dataset name, shape, column info with types, sample rows, and basic stats.
     This rich context enables more accurate insights.
+
+    Per-dataset output is memoized on (name, content fingerprint) so multi-turn
+    sessions don't recompute statistics for unchanged data.
     """
     parts = []
     for name, df in dfs.items():
-        # Basic info
-        num_rows, num_cols = df.shape
-        columns = df.columns.tolist()
+        cache_key = None
+        if _DATASET_INFO_CACHE is not None:
+            fp = _df_fingerprint(df)
+            if fp is not None:
+                cache_key = (name, fp)
+                with _DATASET_INFO_CACHE_LOCK:
+                    cached = _DATASET_INFO_CACHE.get(cache_key)
+                if cached is not None:
+                    parts.append(cached)
+                    continue
+
+        part = _format_one_dataset(name, df)
+        if cache_key is not None:
+            with _DATASET_INFO_CACHE_LOCK:
+                _DATASET_INFO_CACHE[cache_key] = part
+        parts.append(part)
+    return "\n\n" + "="*50 + "\n\n".join(parts)
 
-        # Limit schema size to reduce token bloat + JSON truncation issues in production
-        display_cols = columns[:MAX_SCHEMA_COLUMNS] if MAX_SCHEMA_COLUMNS > 0 else columns
-        omitted_cols = max(0, len(columns) - len(display_cols))
-        
-        # Column types and info
-        col_info = []
-        for col in display_cols:
-            dtype = str(df[col].dtype)
-            non_null = df[col].notna().sum()
-            unique_count = df[col].nunique()
-            col_info.append(f"  - {col} ({dtype}): {non_null} non-null, {unique_count} unique values")
-        if omitted_cols:
-            col_info.append(f"  - ... ({omitted_cols} more columns omitted)")
-        
-        # Sample rows
+
+def _format_one_dataset(name: str, df: pd.DataFrame) -> str:
+    """Build the summary block for a single dataset (uncached work)."""
+    # Basic info
+    num_rows, num_cols = df.shape
+    columns = df.columns.tolist()
+
+    # Limit schema size to reduce token bloat + JSON truncation issues in production
+    display_cols = columns[:MAX_SCHEMA_COLUMNS] if MAX_SCHEMA_COLUMNS > 0 else columns
+    omitted_cols = max(0, len(columns) - len(display_cols))
+
+    # Slice once and reuse; repeated df[display_cols] would copy the data each
+    # time. When nothing is truncated (the common case) skip the copy entirely.
+    sub = df[display_cols] if omitted_cols else df
+
+    # Whole-frame passes instead of per-column loops (each per-column call is a
+    # full scan; on wide frames the vectorized versions are ~5x fewer passes).
+    counts = sub.notna().sum()
+    nuniq = sub.nunique(dropna=True)
+
+    # Classify columns from a single dtypes inspection (no repeated select_dtypes).
+    dtypes = sub.dtypes
+    numeric_cols = [c for c, dt in dtypes.items() if pd.api.types.is_numeric_dtype(dt) and not pd.api.types.is_bool_dtype(dt)]
+    cat_cols = [
+        c for c, dt in dtypes.items()
+        if isinstance(dt, pd.CategoricalDtype) or pd.api.types.is_object_dtype(dt) or pd.api.types.is_string_dtype(dt)
+    ]
+
+    col_info = [
+        f"  - {col} ({dtypes[col]}): {counts[col]} non-null, {nuniq[col]} unique values"
+        for col in display_cols
+    ]
+    if omitted_cols:
+        col_info.append(f"  - ... ({omitted_cols} more columns omitted)")
+
+    # Sample rows as pipe-joined text over itertuples: skips both the pandas
+    # formatter and the CSV writer machinery entirely, and no quoting rules
+    # can mangle cell values destined for a prompt.
+    try:
+        sample_rows = " | ".join(map(str, display_cols)) + "\n" + "\n".join(
+            " | ".join(map(str, row))
+            for row in sub.head(MAX_SAMPLE_ROWS).itertuples(index=False, name=None)
+        )
+    except Exception:
+        sample_rows = df.head(MAX_SAMPLE_ROWS).to_string(index=False)
+
+    # Numeric and categorical summaries from one describe() pass: pandas
+    # computes all the per-column stats in a single C-level sweep instead of
+    # the previous agg + per-column value_counts loops.
+    stats_info = ""
+    cat_info = ""
+    if numeric_cols or cat_cols:
+        stats_parts: list[str] = []
+        cat_parts: list[str] = []
         try:
-            sample_rows = df[display_cols].head(MAX_SAMPLE_ROWS).to_string(index=False)
-        except Exception:
-            sample_rows = df.head(MAX_SAMPLE_ROWS).to_string(index=False)
-        
-        # Basic statistics for numeric columns
-        numeric_cols = df[display_cols].select_dtypes(include=['int64', 'float64', 'int32', 'float32']).columns.tolist()
-        stats_info = ""
-        if numeric_cols:
-            stats_parts = []
-            for col in numeric_cols[:5]:  # Limit to first 5 numeric columns
+            desc = sub.describe(include="all").T
+            num_wanted = set(numeric_cols[:5])
+            cat_wanted = set(cat_cols[:3])  # Limit to first 3 categorical columns
+            has_mean = "mean" in desc.columns
+            has_top = "top" in desc.columns
+            for row in desc.itertuples():
+                col = row.Index
                 try:
-                    col_min = df[col].min()
-                    col_max = df[col].max()
-                    col_mean = df[col].mean()
-                    stats_parts.append(f"  - {col}: min={col_min:.2f}, max={col_max:.2f}, mean={col_mean:.2f}")
+                    if col in num_wanted and has_mean and pd.notna(row.mean):
+                        stats_parts.append(
+                            f"  - {col}: min={row.min:.2f}, max={row.max:.2f}, mean={row.mean:.2f}"
+                        )
+                    elif col in cat_wanted and has_top and pd.notna(row.top):
+                        cat_parts.append(
+                            f"  - {col} top value: {row.top}({int(row.freq)})"
+                        )
                 except Exception:
                     pass
-            if stats_parts:
-                stats_info = "\nNumeric Column Statistics:\n" + "\n".join(stats_parts)
-        
-        # Categorical column value counts (for top categories)
-        cat_cols = df[display_cols].select_dtypes(include=['object', 'category']).columns.tolist()
-        cat_info = ""
-        if cat_cols:
-            cat_parts = []
-            for col in cat_cols[:3]:  # Limit to first 3 categorical columns
-                try:
-                    top_values = df[col].value_counts().head(5)
-                    top_str = ", ".join([f"{v}({c})" for v, c in zip(top_values.index, top_values.values)])
-                    cat_parts.append(f"  - {col} top values: {top_str}")
-                except Exception:
-                    pass
-            if cat_parts:
-                cat_info = "\nCategorical Column Summaries:\n" + "\n".join(cat_parts)
-        
-        parts.append(
-            f"Dataset: {name}\n"
-            f"Shape: {num_rows} rows × {num_cols} columns\n"
-            f"Columns:\n" + "\n".join(col_info) + "\n"
-            f"Sample Data (first 5 rows):\n{sample_rows}"
-            f"{stats_info}"
-            f"{cat_info}"
-        )
-    return "\n\n" + "="*50 + "\n\n".join(parts)
+        except Exception:
+            pass
+        if stats_parts:
+            stats_info = "\nNumeric Column Statistics:\n" + "\n".join(stats_parts)
+        if cat_parts:
+            cat_info = "\nCategorical Column Summaries:\n" + "\n".join(cat_parts)
+
+
+    return (
+    f"Dataset: {name}\n"
+    f"Shape: {num_rows} rows × {num_cols} columns\n"
+    f"Columns:\n" + "\n".join(col_info) + "\n"
+    f"Sample Data (first 5 rows):\n{sample_rows}"
+    f"{stats_info}"
+    f"{cat_info}"
+    )
 
 
 def _should_retry_llm_error(e: Exception) -> bool:
@@ -315,6 +584,55 @@ def _should_retry_llm_error(e: Exception) -> bool:
     return any(m in msg for m in transient_markers)
 
 
+# Cheap probe for the intent field while a response is still streaming in.
+_INTENT_PROBE_RE = re.compile(r'"intent"\s*:\s*"(\w+)"')
+
+
+def _consume_llm_stream(chunks) -> str:
+    """Accumulate streamed chunks; log intent as soon as it appears."""
+    buf: list[str] = []
+    total_len = 0
+    intent_seen = False
+    for chunk in chunks:
+        buf.append(chunk)
+        total_len += len(chunk)
+        # Intent sits in the first chunks of the unified JSON; stop probing
+        # once found (or once enough text arrived that it clearly isn't there).
+        if not intent_seen and total_len < 2048:
+            m = _INTENT_PROBE_RE.search("".join(buf))
+            if m:
+                intent_seen = True
+                logger.info("llm.stream early intent=%s after %d chars", m.group(1), total_len)
+    return "".join(buf)
+
+
+class _TokenBucket:
+    """Minimal thread-safe token bucket (tokens refill continuously)."""
+
+    def __init__(self, rate_per_min: float):
+        self.capacity = max(1.0, rate_per_min)
+        self.tokens = self.capacity
+        self.rate = rate_per_min / 60.0
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_LLM_SEM = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY) if LLM_MAX_CONCURRENCY > 0 else None
+_LLM_BUCKET = _TokenBucket(LLM_RATE_LIMIT_PER_MIN) if LLM_RATE_LIMIT_PER_MIN > 0 else None
+
+
 def _call_llm_with_retries(
     system_prompt: str,
     user_prompt: str,
@@ -322,19 +640,77 @@ def _call_llm_with_retries(
     model_name: str,
     temperature: float,
     max_tokens: int,
+    json_output: bool = False,
 ) -> str:
-    attempts = max(1, 1 + max(0, int(LLM_MAX_RETRIES)))
+    busy = False
+    if _LLM_SEM is not None:
+        busy = not _LLM_SEM.acquire(blocking=False)
+        if busy:
+            logger.info("llm.concurrency_gate waiting (limit=%d)", LLM_MAX_CONCURRENCY)
+            _LLM_SEM.acquire()
+    try:
+        if _LLM_BUCKET is not None:
+            _LLM_BUCKET.acquire()
+        return _call_llm_with_retries_inner(
+            system_prompt,
+            user_prompt,
+            model_name=model_name,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            json_output=json_output,
+            allow_retries=not (busy and LLM_DISABLE_RETRIES_WHEN_BUSY),
+        )
+    finally:
+        if _LLM_SEM is not None:
+            _LLM_SEM.release()
+
+
+def _call_llm_with_retries_inner(
+    system_prompt: str,
+    user_prompt: str,
+    *,
+    model_name: str,
+    temperature: float,
+    max_tokens: int,
+    json_output: bool = False,
+    allow_retries: bool = True,
+) -> str:
+    attempts = max(1, 1 + max(0, int(LLM_MAX_RETRIES))) if allow_retries else 1
     last_err: Exception | None = None
 
+    cache_key = None
+    if _LLM_RESPONSE_CACHE is not None:
+        cache_key = _llm_response_cache_key(system_prompt, user_prompt, model_name, temperature)
+        with _LLM_RESPONSE_CACHE_LOCK:
+            cached = _LLM_RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info("llm.response_cache hit key=%s", cache_key[:8])
+            return cached
+
     for attempt in range(attempts):
         try:
-            return call_llm(
-                system_prompt,
-                user_prompt,
-                max_tokens=max_tokens,
-                model_name=model_name,
-                temperature=temperature,
-            )
+            if LLM_STREAMING:
+                response = _consume_llm_stream(call_llm_stream(
+                    system_prompt,
+                    user_prompt,
+                    max_tokens=max_tokens,
+                    model_name=model_name,
+                    temperature=temperature,
+                    json_output=json_output,
+                ))
+            else:
+                response = call_llm(
+                    system_prompt,
+                    user_prompt,
+                    max_tokens=max_tokens,
+                    model_name=model_name,
+                    temperature=temperature,
+                    json_output=json_output,
+                )
+            if cache_key is not None:
+                with _LLM_RESPONSE_CACHE_LOCK:
+                    _LLM_RESPONSE_CACHE[cache_key] = response
+            return response
         except Exception as e:
             last_err = e
             if attempt >= attempts - 1 or not _should_retry_llm_error(e):
@@ -357,12 +733,97 @@ def _call_llm_with_retries(
     raise RuntimeError("LLM call failed")
 
 
+_SPECULATIVE_EXECUTOR = None
+_SPECULATIVE_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_speculative_executor():
+    """Small shared thread pool for speculative LLM calls (lazy singleton)."""
+    global _SPECULATIVE_EXECUTOR
+    if _SPECULATIVE_EXECUTOR is None:
+        with _SPECULATIVE_EXECUTOR_LOCK:
+            if _SPECULATIVE_EXECUTOR is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                _SPECULATIVE_EXECUTOR = ThreadPoolExecutor(
+                    max_workers=4, thread_name_prefix="llm-speculative"
+                )
+    return _SPECULATIVE_EXECUTOR
+
+
 def _save_dataset_to_temp(df: pd.DataFrame) -> str:
-    """Save DataFrame to a temporary CSV file and return the path."""
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".csv", mode="w", encoding="utf-8")
-    df.to_csv(tmp.name, index=False)
-    tmp.close()
-    return tmp.name
+    """
+    Save DataFrame to a temporary file for a child process and return the path.
+
+    Prefers Feather (binary, preserves dtypes, ~10-50x faster than CSV for wide
+    numeric frames) when pyarrow is installed; falls back to CSV otherwise —
+    pyarrow is optional here because it has no stable wheel on Python 3.14.
+    """
+    try:
+        import pyarrow  # noqa: F401
+
+        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".feather")
+        tmp.close()
+        df.reset_index(drop=True).to_feather(tmp.name)
+        return tmp.name
+    except Exception:
+        # pyarrow missing, or the frame is not Feather-serializable (mixed object cols)
+        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".csv", mode="w", encoding="utf-8")
+        df.to_csv(tmp.name, index=False)
+        tmp.close()
+        return tmp.name
+
+
+def _load_dataset_from_temp(path: str) -> pd.DataFrame:
+    """Child-side counterpart of _save_dataset_to_temp."""
+    if path.endswith(".feather"):
+        return pd.read_feather(path)
+    return pd.read_csv(path)
+
+
+# Content-hash interning of dataset temp files: a chat session re-running
+# graphs against the same frame reuses one on-disk copy instead of writing
+# (and unlinking) a fresh serialization per request.
+_DATASET_TEMP_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_DATASET_TEMP_CACHE_SIZE = 32
+_DATASET_TEMP_CACHE_LOCK = threading.Lock()
+_DATASET_TEMP_DIR = os.path.join(tempfile.gettempdir(), "viz_dataset_cache")
+
+
+def _get_or_save_dataset_temp(df: pd.DataFrame) -> tuple:
+    """Return (path, interned). Interned paths are owned by the cache and
+    must not be unlinked by the caller; frames too large to fingerprint fall
+    back to a throwaway temp file (interned=False)."""
+    fingerprint = _df_fingerprint(df)
+    if fingerprint is None:
+        return _save_dataset_to_temp(df), False
+
+    with _DATASET_TEMP_CACHE_LOCK:
+        path = _DATASET_TEMP_CACHE.get(fingerprint)
+        if path is not None and os.path.exists(path):
+            _DATASET_TEMP_CACHE.move_to_end(fingerprint)
+            return path, True
+
+    tmp_path = _save_dataset_to_temp(df)
+    os.makedirs(_DATASET_TEMP_DIR, exist_ok=True)
+    final_path = os.path.join(
+        _DATASET_TEMP_DIR, fingerprint + os.path.splitext(tmp_path)[1]
+    )
+    os.replace(tmp_path, final_path)
+
+    with _DATASET_TEMP_CACHE_LOCK:
+        _DATASET_TEMP_CACHE[fingerprint] = final_path
+        while len(_DATASET_TEMP_CACHE) > _DATASET_TEMP_CACHE_SIZE:
+            _, evicted = _DATASET_TEMP_CACHE.popitem(last=False)
+            try:
+                os.unlink(evicted)
+            except OSError:
+                pass
+    return final_path, True
+
+
+# Precompiled at module scope (see _JSON_FENCE_RE above for the same rationale).
+_CODE_FENCE_RE = re.compile(r"```(?:python|py)?\s*(.*?)```", re.IGNORECASE | re.DOTALL)
 
 
 def _extract_code(text: str) -> str:
@@ -374,32 +835,40 @@ def _extract_code(text: str) -> str:
     """
     # First handle markdown code blocks if present
     if "```" in text:
-        pattern = re.compile(r"```(?:python|py)?\s*(.*?)```", re.IGNORECASE | re.DOTALL)
-        match = pattern.search(text)
+        match = _CODE_FENCE_RE.search(text)
         if match:
             text = match.group(1).strip()
         else:
             # Fallback: remove all fences
             text = text.replace("```python", "").replace("```py", "").replace("```", "")
             text = text.strip()
-    
+
     # Unescape JSON string escapes (literal \n, \", \\, \t)
     # This handles code that was returned as a JSON-escaped string
     if "\\n" in text or "\\\"" in text or "\\\\" in text:
-        # Replace escaped sequences with actual characters
-        text = text.replace("\\n", "\n")
-        text = text.replace("\\t", "\t")
-        text = text.replace("\\\"", "\"")
-        text = text.replace("\\'", "'")
-        text = text.replace("\\\\", "\\")
-    
+        if text.isascii():
+            # Single C-level pass instead of five chained str.replace scans.
+            # unicode_escape round-trips through latin-1 and would mangle
+            # non-ASCII characters, so it is only applied to ASCII code.
+            text = codecs.decode(text, "unicode_escape")
+        else:
+            text = text.replace("\\n", "\n")
+            text = text.replace("\\t", "\t")
+            text = text.replace("\\\"", "\"")
+            text = text.replace("\\'", "'")
+            text = text.replace("\\\\", "\\")
+
     return text.strip()
 
 
+@functools.lru_cache(maxsize=256)
 def _wrap_transformation_code(transformation: str) -> str:
     """
     Wrap the LLM's transformation code with the required boilerplate.
     This removes the burden of JSON escaping from the LLM.
+
+    Pure string-to-string, so cached: chat sessions replaying a chart resend
+    identical transformations.
     """
     # Clean up the transformation code
     transformation = _extract_code(transformation)
@@ -410,7 +879,8 @@ import json
 import pandas as pd
 
 try:
-    df = pd.read_csv(sys.argv[1])
+    _path = sys.argv[1]
+    df = pd.read_feather(_path) if _path.endswith(".feather") else pd.read_csv(_path)
     df.columns = df.columns.str.strip()
     
     # LLM-generated transformation code
@@ -424,16 +894,18 @@ except Exception as e:
 
 
 def _indent_code(code: str, spaces: int = 4) -> str:
-    """Indent each line of code by the specified number of spaces."""
-    indent = " " * spaces
-    lines = code.split("\n")
-    return "\n".join(indent + line if line.strip() else line for line in lines)
+    """Indent each non-blank line of code by the specified number of spaces."""
+    return textwrap.indent(code, " " * spaces, predicate=lambda line: bool(line.strip()))
 
 
 def _run_code(code: str, csv_path: str, timeout: Optional[int] = None) -> Dict[str, Any]:
     """
     Execute the generated Python code with the CSV path as argument.
     Returns parsed JSON with 'values' and 'summary' keys.
+
+    The script is piped to the interpreter over stdin (``python -``) rather
+    than written to a temp .py file, dropping two filesystem round trips
+    (write + unlink) per execution.
     """
     if not code.strip():
         logger.error("_run_code: Generated code is empty")
@@ -442,17 +914,10 @@ def _run_code(code: str, csv_path: str, timeout: Optional[int] = None) -> Dict[s
     effective_timeout = timeout or CODE_EXECUTION_TIMEOUT
     logger.debug("_run_code: Executing code with timeout=%ds, csv_path=%s", effective_timeout, csv_path)
 
-    # Write code to temp file
-    script_file = tempfile.NamedTemporaryFile(delete=False, suffix=".py", mode="w", encoding="utf-8")
-    script_file.write(code)
-    script_file.flush()
-    script_file.close()
-    
-    logger.debug("_run_code: Script written to %s", script_file.name)
-
     try:
         proc = subprocess.run(
-            ["python", script_file.name, csv_path],
+            ["python", "-", csv_path],
+            input=code,
             capture_output=True,
             text=True,
             timeout=effective_timeout,
@@ -460,11 +925,6 @@ def _run_code(code: str, csv_path: str, timeout: Optional[int] = None) -> Dict[s
     except subprocess.TimeoutExpired:
         logger.error("_run_code: Code execution timed out after %ds", effective_timeout)
         raise RuntimeError(f"Code execution timed out after {effective_timeout} seconds")
-    finally:
-        try:
-            os.unlink(script_file.name)
-        except Exception:
-            pass
 
     if proc.returncode != 0:
         logger.error("_run_code: Code execution failed. stderr=%s", proc.stderr.strip()[:500])
@@ -488,6 +948,251 @@ def _run_code(code: str, csv_path: str, timeout: Optional[int] = None) -> Dict[s
     return data
 
 
+def _make_safe_builtins() -> Dict[str, Any]:
+    """Builtins namespace for in-process execution of generated code.
+
+    Generous enough for pandas-style transformations, but without file/process
+    primitives; imports are restricted to an allowlist of analysis modules.
+    """
+    import builtins as _b
+
+    allowed = [
+        "abs", "all", "any", "bool", "dict", "divmod", "enumerate", "filter",
+        "float", "format", "frozenset", "getattr", "hasattr", "hash", "int",
+        "isinstance", "issubclass", "iter", "len", "list", "map", "max", "min",
+        "next", "print", "range", "repr", "reversed", "round", "set", "setattr",
+        "slice", "sorted", "str", "sum", "tuple", "type", "zip",
+        "ArithmeticError", "AttributeError", "Exception", "IndexError",
+        "KeyError", "StopIteration", "TypeError", "ValueError", "ZeroDivisionError",
+        "True", "False", "None",
+    ]
+    safe = {name: getattr(_b, name) for name in allowed if hasattr(_b, name)}
+
+    allowed_modules = {
+        "pandas", "numpy", "math", "json", "re", "datetime",
+        "statistics", "collections", "itertools",
+    }
+
+    def _safe_import(name, globals=None, locals=None, fromlist=(), level=0):
+        root = name.split(".")[0]
+        if root not in allowed_modules:
+            raise ImportError(f"Import of '{name}' is not allowed in generated code")
+        return _b.__import__(name, globals, locals, fromlist, level)
+
+    safe["__import__"] = _safe_import
+    return safe
+
+
+_SAFE_BUILTINS = _make_safe_builtins()
+
+# Compiled-bytecode cache for the in-process path. Retried or repeated LLM
+# outputs are often byte-identical, so keying on a content hash skips the
+# re-parse. Bounded so pathological sessions cannot grow it without limit.
+_CODE_CACHE: "OrderedDict[bytes, Any]" = OrderedDict()
+_CODE_CACHE_SIZE = 128
+_CODE_CACHE_LOCK = threading.Lock()
+
+
+def _compile_transformation(transformation: str):
+    key = hashlib.blake2b(transformation.encode("utf-8"), digest_size=16).digest()
+    with _CODE_CACHE_LOCK:
+        compiled = _CODE_CACHE.get(key)
+        if compiled is not None:
+            _CODE_CACHE.move_to_end(key)
+            return compiled
+    compiled = compile(transformation, f"<llm-{key.hex()[:8]}>", "exec", optimize=2)
+    with _CODE_CACHE_LOCK:
+        _CODE_CACHE[key] = compiled
+        while len(_CODE_CACHE) > _CODE_CACHE_SIZE:
+            _CODE_CACHE.popitem(last=False)
+    return compiled
+
+
+def _run_transformation_inprocess(
+    transformation: str,
+    df: pd.DataFrame,
+    timeout: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Execute the (cleaned) transformation code in this process against a copy of
+    the already-loaded DataFrame.
+
+    Avoids the per-request interpreter startup, pandas re-import, and CSV
+    round trip that the subprocess path pays. Timeout is enforced by running
+    the exec on a worker thread and abandoning it if it overruns.
+    """
+    if not transformation.strip():
+        logger.error("_run_transformation_inprocess: Generated code is empty")
+        raise RuntimeError("Generated code is empty")
+
+    effective_timeout = timeout or CODE_EXECUTION_TIMEOUT
+    compiled = _compile_transformation(transformation)
+
+    df = df.copy()
+    # Match the subprocess/pool loaders, which strip header whitespace before
+    # the generated code references columns by name.
+    df.columns = df.columns.str.strip()
+    # Single namespace for globals and locals so functions defined by the
+    # generated code can still resolve its top-level variables.
+    ns: Dict[str, Any] = {"pd": pd, "df": df, "__builtins__": _SAFE_BUILTINS}
+    outcome: Dict[str, Any] = {}
+
+    def _target():
+        try:
+            exec(compiled, ns)
+        except Exception as e:
+            outcome["error"] = e
+
+    worker = threading.Thread(target=_target, daemon=True, name="llm-code-exec")
+    worker.start()
+    worker.join(effective_timeout)
+
+    if worker.is_alive():
+        # Best effort: the thread cannot be killed; it is abandoned as a daemon.
+        logger.error(
+            "_run_transformation_inprocess: timed out after %ds (thread abandoned)",
+            effective_timeout,
+        )
+        raise RuntimeError(f"Code execution timed out after {effective_timeout} seconds")
+
+    if "error" in outcome:
+        e = outcome["error"]
+        logger.error("_run_transformation_inprocess: execution failed: %s", str(e)[:500])
+        raise RuntimeError(f"Code execution failed: {str(e)[:500]}")
+
+    if "values" not in ns or "summary" not in ns:
+        raise RuntimeError("Output must contain 'values' and 'summary' keys")
+
+    values = ns["values"]
+    summary = ns["summary"]
+    logger.info(
+        "_run_transformation_inprocess: Success. values_type=%s, summary_keys=%s",
+        type(values).__name__,
+        list(summary.keys()) if isinstance(summary, dict) else type(summary).__name__,
+    )
+    return {"values": values, "summary": summary}
+
+
+def _heatmap_clean(arr: np.ndarray):
+    """
+    Vectorized scrub of a heatmap matrix: non-finite values become NaN,
+    all-NaN rows/columns are dropped, and NaN-aware zmin/zmax are computed.
+
+    Replaces the per-element Python coercion loop (1600 calls for a 40x40
+    correlation matrix) with a handful of whole-array C passes.
+    """
+    finite = np.isfinite(arr)
+    arr = np.where(finite, arr, np.nan)
+    keep_row = finite.any(axis=1)
+    keep_col = finite.any(axis=0)
+    # Row/column slicing yields a non-contiguous view, which orjson's numpy
+    # serializer rejects; hand back a contiguous buffer.
+    arr = np.ascontiguousarray(arr[keep_row][:, keep_col])
+    if arr.size and np.isfinite(arr).any():
+        zmin = float(np.nanmin(arr))
+        zmax = float(np.nanmax(arr))
+    else:
+        zmin = zmax = float("nan")
+    return arr, keep_row, keep_col, zmin, zmax
+
+
+_WORKER_POOL = None
+_WORKER_POOL_LOCK = threading.Lock()
+
+
+def _worker_init():
+    # Warm the heavy imports once per worker instead of once per request.
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+
+
+def _worker_exec(transformation: str, data_path: str) -> Dict[str, Any]:
+    """Run a transformation inside a pool worker. Must stay picklable/top-level."""
+    df = _load_dataset_from_temp(data_path)
+    df.columns = df.columns.str.strip()
+    ns: Dict[str, Any] = {"pd": pd, "df": df, "__builtins__": _SAFE_BUILTINS}
+    exec(compile(transformation, "<llm-transformation>", "exec"), ns)
+    if "values" not in ns or "summary" not in ns:
+        raise RuntimeError("Output must contain 'values' and 'summary' keys")
+    return {"values": ns["values"], "summary": ns["summary"]}
+
+
+def _get_worker_pool():
+    """Lazily create the persistent execution pool (forkserver keeps workers clean)."""
+    global _WORKER_POOL
+    if _WORKER_POOL is None:
+        with _WORKER_POOL_LOCK:
+            if _WORKER_POOL is None:
+                import multiprocessing
+                ctx = multiprocessing.get_context("forkserver")
+                _WORKER_POOL = ctx.Pool(processes=WORKER_POOL_SIZE, initializer=_worker_init)
+                logger.info("worker_pool.started processes=%d", WORKER_POOL_SIZE)
+    return _WORKER_POOL
+
+
+def _run_code_pooled(transformation: str, csv_path: str, timeout: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Execute the transformation on a long-lived worker (pandas already imported),
+    amortizing interpreter startup across requests while keeping process isolation.
+    """
+    if not transformation.strip():
+        logger.error("_run_code_pooled: Generated code is empty")
+        raise RuntimeError("Generated code is empty")
+
+    effective_timeout = timeout or CODE_EXECUTION_TIMEOUT
+    pool = _get_worker_pool()
+    async_result = pool.apply_async(_worker_exec, (transformation, csv_path))
+    try:
+        data = async_result.get(timeout=effective_timeout)
+    except multiprocessing_TimeoutError:
+        # A stuck worker cannot be recovered individually; rebuild the pool.
+        global _WORKER_POOL
+        with _WORKER_POOL_LOCK:
+            if _WORKER_POOL is pool:
+                _WORKER_POOL = None
+        pool.terminate()
+        logger.error("_run_code_pooled: timed out after %ds (pool recycled)", effective_timeout)
+        raise RuntimeError(f"Code execution timed out after {effective_timeout} seconds")
+    except Exception as e:
+        logger.error("_run_code_pooled: execution failed: %s", str(e)[:500])
+        raise RuntimeError(f"Code execution failed: {str(e)[:500]}")
+
+    logger.info("_run_code_pooled: Success. values_type=%s", type(data["values"]).__name__)
+    return data
+
+
+# Memo for _values_to_plotly keyed on a content hash of the values payload.
+# The conversion is deterministic, so a replayed chart (same transformation,
+# same data) reuses the finished figure config.
+_PLOTLY_CACHE: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_PLOTLY_CACHE_SIZE = 64
+_PLOTLY_CACHE_LOCK = threading.Lock()
+
+
+def _values_to_plotly_cached(values: Dict[str, Any], graph_type: str) -> Dict[str, Any]:
+    """Memoizing front end for _values_to_plotly (falls through if unhashable)."""
+    try:
+        digest = hashlib.blake2b(
+            orjson.dumps(values, default=str, option=_ORJSON_OPTS), digest_size=16
+        ).digest()
+    except Exception:
+        return _values_to_plotly(values, graph_type)
+
+    key = (digest, graph_type)
+    with _PLOTLY_CACHE_LOCK:
+        cached = _PLOTLY_CACHE.get(key)
+        if cached is not None:
+            _PLOTLY_CACHE.move_to_end(key)
+            return copy.deepcopy(cached)
+
+    config = _values_to_plotly(values, graph_type)
+    with _PLOTLY_CACHE_LOCK:
+        _PLOTLY_CACHE[key] = copy.deepcopy(config)
+        while len(_PLOTLY_CACHE) > _PLOTLY_CACHE_SIZE:
+            _PLOTLY_CACHE.popitem(last=False)
+    return config
+
+
 def _values_to_plotly(values: Dict[str, Any], graph_type: str) -> Dict[str, Any]:
     """
     DETERMINISTICALLY convert standardized values to Plotly configuration.
@@ -630,17 +1335,22 @@ def _values_to_plotly(values: Dict[str, Any], graph_type: str) -> Dict[str, Any]
 
         # Clean/convert values to numbers / None and drop empty rows/cols
         if isinstance(z_mat, list) and z_mat:
-            cleaned = [[_coerce_num(v) for v in (row if isinstance(row, list) else [])] for row in z_mat]
-
-            # Determine shape
-            row_count = len(cleaned)
-            col_count = max((len(r) for r in cleaned), default=0)
+            # Pad ragged rows before the array conversion
+            rows = [row if isinstance(row, list) else [] for row in z_mat]
+            row_count = len(rows)
+            col_count = max((len(r) for r in rows), default=0)
             if col_count == 0:
-                cleaned = []
+                return {"data": [], "layout": layout}
+            rows = [r + [None] * (col_count - len(r)) for r in rows]
 
-            # Pad ragged rows
-            if cleaned and col_count:
-                cleaned = [r + [None] * (col_count - len(r)) for r in cleaned]
+            # One bulk conversion; fall back to per-element coercion only when
+            # the matrix contains non-numeric strings numpy cannot parse.
+            try:
+                arr = np.asarray(rows, dtype=np.float64)
+            except (TypeError, ValueError):
+                arr = np.asarray(
+                    [[_coerce_num(v) for v in r] for r in rows], dtype=np.float64
+                )
 
             # Build default labels if missing
             if not isinstance(x_labels, list) or len(x_labels) != col_count:
@@ -648,25 +1358,18 @@ def _values_to_plotly(values: Dict[str, Any], graph_type: str) -> Dict[str, Any]
             if not isinstance(y_labels, list) or len(y_labels) != row_count:
                 y_labels = list(range(row_count))
 
-            # Drop all-null rows
-            keep_row = [any(v is not None for v in row) for row in cleaned]
-            cleaned = [row for row, keep in zip(cleaned, keep_row) if keep]
-            y_labels = [y for y, keep in zip(y_labels, keep_row) if keep]
-
-            # Drop all-null cols
-            if cleaned:
-                keep_col = [any(cleaned[r][c] is not None for r in range(len(cleaned))) for c in range(col_count)]
-                cleaned = [[row[c] for c in range(col_count) if keep_col[c]] for row in cleaned]
-                x_labels = [x for x, keep in zip(x_labels, keep_col) if keep]
-
-            # Compute z range
-            flat = [v for row in cleaned for v in row if v is not None]
-            if not flat:
+            arr, keep_row, keep_col, zmin, zmax = _heatmap_clean(arr)
+            if not arr.size or not math.isfinite(zmin):
                 # Nothing to render
                 return {"data": [], "layout": layout}
 
-            zmin = min(flat)
-            zmax = max(flat)
+            y_labels = [y for y, keep in zip(y_labels, keep_row) if keep]
+            x_labels = [x for x, keep in zip(x_labels, keep_col) if keep]
+
+            # Keep z as an ndarray; _safe_serialize converts it (NaN -> None)
+            # in a single vectorized pass at the response boundary instead of
+            # boxing every cell into a PyFloat here.
+            cleaned = arr
 
             # Correlation matrices should be within [-1, 1]; clamp if close
             if -1.05 <= zmin <= 0 and 0 <= zmax <= 1.05:
@@ -674,9 +1377,9 @@ def _values_to_plotly(values: Dict[str, Any], graph_type: str) -> Dict[str, Any]
 
             logger.info(
                 "_values_to_plotly: heatmap ready rows=%d cols=%d non_null=%d zmin=%.3f zmax=%.3f",
-                len(cleaned),
-                len(cleaned[0]) if cleaned else 0,
-                len(flat),
+                arr.shape[0],
+                arr.shape[1],
+                int(np.isfinite(arr).sum()),
                 float(zmin),
                 float(zmax),
             )
@@ -690,9 +1393,9 @@ def _values_to_plotly(values: Dict[str, Any], graph_type: str) -> Dict[str, Any]
                 "zmax": zmax,
             }
             # Only set x/y if lengths match; otherwise let Plotly auto-index.
-            if isinstance(x_labels, list) and cleaned and len(x_labels) == len(cleaned[0]):
+            if isinstance(x_labels, list) and arr.size and len(x_labels) == arr.shape[1]:
                 trace["x"] = x_labels
-            if isinstance(y_labels, list) and len(y_labels) == len(cleaned):
+            if isinstance(y_labels, list) and len(y_labels) == arr.shape[0]:
                 trace["y"] = y_labels
 
             fig_data.append(trace)
@@ -767,20 +1470,44 @@ def _values_to_plotly(values: Dict[str, Any], graph_type: str) -> Dict[str, Any]
     return {"data": fig_data, "layout": layout}
 
 
+_ORJSON_OPTS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
 def _safe_serialize(obj: Any) -> Any:
-    """Convert pandas/numpy types to native Python types for JSON serialization."""
+    """
+    Convert pandas/numpy types to native Python types for JSON serialization.
+
+    One orjson round trip does the whole tree in C (numpy scalars/arrays
+    handled natively, NaN/Inf become null) instead of a recursive Python walk
+    allocating a parallel structure. No `default` hook: anything orjson cannot
+    encode (e.g. arrays it refuses) must raise so the Python fallback converts
+    it properly instead of a str() silently mangling it.
+    """
     if isinstance(obj, (int, float, str, bool)) or obj is None:
         return obj
     try:
-        import numpy as np
-        if isinstance(obj, (np.integer, np.floating, np.bool_)):
-            return obj.item()
+        return orjson.loads(orjson.dumps(obj, option=_ORJSON_OPTS))
     except Exception:
-        pass
+        return _safe_serialize_py(obj)
+
+
+def _safe_serialize_py(obj: Any) -> Any:
+    """Recursive fallback for structures orjson cannot round-trip."""
+    if isinstance(obj, (int, float, str, bool)) or obj is None:
+        return obj
+    if isinstance(obj, (np.integer, np.floating, np.bool_)):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        # Single vectorized pass; non-finite floats become None for JSON.
+        if np.issubdtype(obj.dtype, np.floating):
+            out = obj.astype(object)
+            out[~np.isfinite(obj.astype(np.float64))] = None
+            return out.tolist()
+        return obj.tolist()
     if isinstance(obj, dict):
-        return {_safe_serialize(k): _safe_serialize(v) for k, v in obj.items()}
+        return {_safe_serialize_py(k): _safe_serialize_py(v) for k, v in obj.items()}
     if isinstance(obj, (list, tuple)):
-        return [_safe_serialize(x) for x in obj]
+        return [_safe_serialize_py(x) for x in obj]
     return str(obj)
 
 
@@ -810,7 +1537,7 @@ def analyze(
         # Backend has already chosen the arm (per-chat bandit stored in MongoDB)
         arm_id = arm_config.get("arm_id", "unified_base")
         arm_temperature = arm_config.get("temperature", 0.1)
-        arm_model_name = arm_config.get("model_name", os.getenv("GEMINI_MODEL", "gemini-2.5-flash"))
+        arm_model_name = arm_config.get("model_name", _DEFAULT_GEMINI_MODEL)
         logger.info(
             "analyze: Using arm config from backend arm_id=%s temp=%s model=%s",
             arm_id, arm_temperature, arm_model_name,
@@ -828,98 +1555,161 @@ def analyze(
 
     def _ret(payload: Dict[str, Any]) -> Dict[str, Any]:
         payload["arm_id"] = arm_id
-        return _safe_serialize(payload)
-
-    # Single LLM call for intent detection + content generation
-    try:
-        system_prompt = _read_prompt(UNIFIED_PROMPT_PATH)
-    except FileNotFoundError as e:
-        logger.error(f"Unified prompt file not found: {UNIFIED_PROMPT_PATH}")
-        return _ret({
-            "intent": None,
-            "dataset_name": None,
-            "graph_type": None,
-            "insights": None,
-            "plotly": None,
-            "summary": None,
-            "values": None,
-            "code": None,
-            "error": f"Unified prompt file not found: {e}",
-        })
+        # Only values/summary/plotly can carry numpy/pandas objects; the other
+        # fields are str/int/None literals, so skip walking them. For the
+        # insight/recommend/profile flows all three are None and this is free.
+        for key in ("values", "summary", "plotly"):
+            if payload.get(key) is not None:
+                payload[key] = _safe_serialize(payload[key])
+        return payload
+
+    # Response cache: identical request + schema + history skips the LLM entirely.
+    unified_result = None
+    parse_error: Exception | None = None
+    cache_key = _llm_cache_key(user_text, dfs, history_summary) if _LLM_CACHE is not None else None
+    if cache_key is not None:
+        with _LLM_CACHE_LOCK:
+            cached = _LLM_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info("analyze: LLM cache hit key=%s", cache_key[:12])
+            unified_result = copy.deepcopy(cached)
 
-    if arm_id == "unified_strict_json":
+    if unified_result is None:
+        # Single LLM call for intent detection + content generation
         try:
-            strict_suffix = _read_prompt(UNIFIED_STRICT_SUFFIX_PATH)
-            system_prompt = system_prompt + "\n\n" + strict_suffix.strip() + "\n"
-        except FileNotFoundError:
-            logger.warning(
-                "Strict JSON suffix prompt missing: %s (continuing with base prompt)",
-                UNIFIED_STRICT_SUFFIX_PATH,
-            )
-
-    user_prompt = (
-        f"User Request: {user_text}\n\n"
-        f"Conversation History:\n{history_summary if history_summary else '(No previous conversation)'}\n\n"
-        f"Available Datasets:\n{datasets_info}\n\n"
-        "Analyze the request and respond with the appropriate JSON."
-    )
+            system_prompt = _read_prompt(UNIFIED_PROMPT_PATH)
+        except FileNotFoundError as e:
+            logger.error(f"Unified prompt file not found: {UNIFIED_PROMPT_PATH}")
+            return _ret({
+                "intent": None,
+                "dataset_name": None,
+                "graph_type": None,
+                "insights": None,
+                "plotly": None,
+                "summary": None,
+                "values": None,
+                "code": None,
+                "error": f"Unified prompt file not found: {e}",
+            })
 
-    try:
-        response = _call_llm_with_retries(
-            system_prompt,
-            user_prompt,
-            max_tokens=MAX_LLM_TOKENS,
-            model_name=arm_model_name,
-            temperature=arm_temperature,
-        )
-        logger.debug(f"LLM raw response: {response}")
-    except Exception as e:
-        logger.error(f"LLM call failed: {e}")
-        return _ret({
-            "intent": None,
-            "dataset_name": None,
-            "graph_type": None,
-            "insights": None,
-            "plotly": None,
-            "summary": None,
-            "values": None,
-            "code": None,
-            "error": f"LLM call failed: {e}",
-        })
+        if arm_id == "unified_strict_json":
+            try:
+                strict_suffix = _read_prompt(UNIFIED_STRICT_SUFFIX_PATH)
+                system_prompt = system_prompt + "\n\n" + strict_suffix.strip() + "\n"
+            except FileNotFoundError:
+                logger.warning(
+                    "Strict JSON suffix prompt missing: %s (continuing with base prompt)",
+                    UNIFIED_STRICT_SUFFIX_PATH,
+                )
 
-    # Parse unified response (optionally retry once if the model returns invalid JSON)
-    unified_result = None
-    parse_error: Exception | None = None
+        # join() assembles the prompt in one allocation instead of the
+        # quadratic copies of chained f-string concatenation.
+        user_prompt = "\n\n".join((
+            f"User Request: {user_text}",
+            f"Conversation History:\n{history_summary if history_summary else '(No previous conversation)'}",
+            f"Available Datasets:\n{datasets_info}",
+            "Analyze the request and respond with the appropriate JSON.",
+        ))
+
+        # Speculative repair: fire the strict-JSON variant alongside the
+        # primary call so a parse failure can fall back to an answer that is
+        # (usually) already in flight instead of paying a second round trip.
+        repair_future = None
+        if LLM_SPECULATIVE_REPAIR and LLM_JSON_REPAIR_MAX > 0 and arm_id != "unified_strict_json":
+            repair_system_prompt = system_prompt
+            try:
+                strict_suffix = _read_prompt(UNIFIED_STRICT_SUFFIX_PATH)
+                repair_system_prompt = system_prompt + "\n\n" + strict_suffix.strip() + "\n"
+            except FileNotFoundError:
+                pass
+            repair_future = _get_speculative_executor().submit(
+                _call_llm_with_retries,
+                repair_system_prompt,
+                user_prompt,
+                max_tokens=MAX_LLM_TOKENS,
+                model_name=arm_model_name,
+                temperature=0.0,
+                json_output=True,
+            )
 
-    for attempt in range(1 + max(0, int(LLM_JSON_REPAIR_MAX))):
         try:
-            unified_result = _extract_unified_response(response)
-            parse_error = None
-            break
-        except (json.JSONDecodeError, Exception) as e:
-            parse_error = e
-            logger.error(f"Failed to parse LLM response as JSON: {e}")
-            logger.error(f"Raw response was: {response[:1000]}...")
-
-            if attempt >= int(LLM_JSON_REPAIR_MAX):
-                break
-
-            # Ask the model to output ONLY valid JSON (same prompt; lower temp)
-            repair_prompt = (
-                user_prompt
-                + "\n\nIMPORTANT: Your previous output was invalid JSON. Output ONLY a valid JSON object that matches the required schema. No extra text."
+            # JSON mode: token-level constraint makes prose-wrapped or invalid
+            # JSON responses (and the repair retry they trigger) rare.
+            response = _call_llm_with_retries(
+                system_prompt,
+                user_prompt,
+                max_tokens=MAX_LLM_TOKENS,
+                model_name=arm_model_name,
+                temperature=arm_temperature,
+                json_output=True,
             )
+            logger.debug(f"LLM raw response: {response}")
+        except Exception as e:
+            logger.error(f"LLM call failed: {e}")
+            if repair_future is not None:
+                repair_future.cancel()
+            return _ret({
+                "intent": None,
+                "dataset_name": None,
+                "graph_type": None,
+                "insights": None,
+                "plotly": None,
+                "summary": None,
+                "values": None,
+                "code": None,
+                "error": f"LLM call failed: {e}",
+            })
+
+        # Parse unified response (optionally retry once if the model returns invalid JSON)
+        for attempt in range(1 + max(0, int(LLM_JSON_REPAIR_MAX))):
             try:
-                response = _call_llm_with_retries(
-                    system_prompt,
-                    repair_prompt,
-                    max_tokens=MAX_LLM_TOKENS,
-                    model_name=arm_model_name,
-                    temperature=0.0,
-                )
-            except Exception as e2:
-                parse_error = e2
+                unified_result = _extract_unified_response(response)
+                parse_error = None
+                if repair_future is not None:
+                    repair_future.cancel()
+                    repair_future = None
                 break
+            except (json.JSONDecodeError, Exception) as e:
+                parse_error = e
+                logger.error(f"Failed to parse LLM response as JSON: {e}")
+                logger.error(f"Raw response was: {response[:1000]}...")
+
+                if attempt >= int(LLM_JSON_REPAIR_MAX):
+                    break
+
+                # Prefer the speculative strict-JSON answer already in flight.
+                if repair_future is not None:
+                    try:
+                        response = repair_future.result()
+                        continue
+                    except Exception as e2:
+                        parse_error = e2
+                        break
+                    finally:
+                        repair_future = None
+
+                # Ask the model to output ONLY valid JSON (same prompt; lower temp)
+                repair_prompt = (
+                    user_prompt
+                    + "\n\nIMPORTANT: Your previous output was invalid JSON. Output ONLY a valid JSON object that matches the required schema. No extra text."
+                )
+                try:
+                    response = _call_llm_with_retries(
+                        system_prompt,
+                        repair_prompt,
+                        max_tokens=MAX_LLM_TOKENS,
+                        model_name=arm_model_name,
+                        temperature=0.0,
+                        json_output=True,
+                    )
+                except Exception as e2:
+                    parse_error = e2
+                    break
+
+        if unified_result is not None and cache_key is not None:
+            snapshot = copy.deepcopy(unified_result)
+            with _LLM_CACHE_LOCK:
+                _LLM_CACHE[cache_key] = snapshot
 
     if unified_result is None:
         return _ret({
@@ -1001,8 +1791,24 @@ def analyze(
     if intent_type == "profile":
         selected_df = dfs[dataset_name]
         try:
-            report_id = _generate_profile_report_id()
-            html_path = _generate_profile_report_html_to_disk(selected_df, report_id)
+            # Content-addressed report id: the frame's fingerprint rendered as
+            # a UUID, so re-profiling unchanged data finds the HTML already on
+            # disk and skips the multi-second ydata render entirely.
+            fingerprint = _df_fingerprint(selected_df)
+            cache_hit = False
+            if fingerprint is not None:
+                report_id = str(uuid.UUID(hex=fingerprint))
+                html_path = os.path.join(_PROFILE_REPORTS_DIR, f"{report_id}.html")
+                cache_hit = os.path.exists(html_path)
+            else:
+                report_id = _generate_profile_report_id()
+
+            if cache_hit:
+                logger.info("profile.cache_hit report_id=%s", report_id)
+                os.utime(html_path, None)  # refresh mtime for LRU eviction
+            else:
+                html_path = _generate_profile_report_html_to_disk(selected_df, report_id)
+                _evict_old_profile_reports()
 
             # If configured, persist report externally so the link survives Render restarts/redeploys.
             profile_url = None
@@ -1094,34 +1900,61 @@ def analyze(
         })
 
     selected_df = dfs[dataset_name]
-    full_code = _wrap_transformation_code(transformation)
 
-    csv_path = _save_dataset_to_temp(selected_df)
-    try:
-        # Use env-configured timeout (Render can be slower than local)
-        runner_output = _run_code(full_code, csv_path, timeout=None)
-        values = runner_output["values"]
-        summary = runner_output["summary"]
-    except Exception as e:
-        return _ret({
-            "intent": "graph",
-            "dataset_name": dataset_name,
-            "graph_type": graph_type,
-            "insights": None,
-            "plotly": None,
-            "summary": None,
-            "values": None,
-            "code": full_code,
-            "error": f"Code execution failed: {str(e)}",
-        })
-    finally:
+    if CODE_EXECUTION_MODE == "subprocess":
+        # Opt-in isolated path: pooled workers (pandas pre-imported) when
+        # WORKER_POOL > 0, otherwise a fresh child interpreter per request.
+        use_pool = WORKER_POOL_SIZE > 0
+        full_code = _extract_code(transformation) if use_pool else _wrap_transformation_code(transformation)
+        csv_path, csv_interned = _get_or_save_dataset_temp(selected_df)
         try:
-            os.unlink(csv_path)
-        except Exception:
-            pass
+            # Use env-configured timeout (Render can be slower than local)
+            if use_pool:
+                runner_output = _run_code_pooled(full_code, csv_path, timeout=None)
+            else:
+                runner_output = _run_code(full_code, csv_path, timeout=None)
+            values = runner_output["values"]
+            summary = runner_output["summary"]
+        except Exception as e:
+            return _ret({
+                "intent": "graph",
+                "dataset_name": dataset_name,
+                "graph_type": graph_type,
+                "insights": None,
+                "plotly": None,
+                "summary": None,
+                "values": None,
+                "code": full_code,
+                "error": f"Code execution failed: {str(e)}",
+            })
+        finally:
+            if not csv_interned:
+                try:
+                    os.unlink(csv_path)
+                except Exception:
+                    pass
+    else:
+        # Default: run against the already-loaded DataFrame in this process.
+        full_code = _extract_code(transformation)
+        try:
+            runner_output = _run_transformation_inprocess(full_code, selected_df, timeout=None)
+            values = runner_output["values"]
+            summary = runner_output["summary"]
+        except Exception as e:
+            return _ret({
+                "intent": "graph",
+                "dataset_name": dataset_name,
+                "graph_type": graph_type,
+                "insights": None,
+                "plotly": None,
+                "summary": None,
+                "values": None,
+                "code": full_code,
+                "error": f"Code execution failed: {str(e)}",
+            })
 
     try:
-        plotly_config = _values_to_plotly(values, graph_type)
+        plotly_config = _values_to_plotly_cached(values, graph_type)
         return _ret({
             "intent": "graph",
             "dataset_name": dataset_name,
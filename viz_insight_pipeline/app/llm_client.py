@@ -8,7 +8,8 @@ Rationale:
 """
 
 import os
-from typing import Optional
+import threading
+from typing import Dict, Optional
 
 try:
     from google import genai
@@ -20,6 +21,123 @@ except Exception as e:  # pragma: no cover
     )
 
 
+# genai.Client construction sets up auth and an httpx session; reuse one per
+# api key so every LLM call shares the warm connection pool. Keyed by api key
+# (not a bare singleton) so a key rotation mid-process still works.
+_CLIENTS: Dict[str, "genai.Client"] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def _get_client(api_key: str) -> "genai.Client":
+    client = _CLIENTS.get(api_key)
+    if client is None:
+        with _CLIENTS_LOCK:
+            client = _CLIENTS.get(api_key)
+            if client is None:
+                client = genai.Client(api_key=api_key)
+                _CLIENTS[api_key] = client
+    return client
+
+
+def _build_config(
+    system_prompt: str, temperature: float, max_tokens: int, json_output: bool
+) -> "types.GenerateContentConfig":
+    kwargs = dict(
+        system_instruction=system_prompt,
+        temperature=temperature,
+        max_output_tokens=max_tokens,
+    )
+    if json_output:
+        # Constrain decoding to valid JSON at the token level, so downstream
+        # parsing (and its repair retry) almost never sees prose-wrapped
+        # output. No response_schema: the unified response's shape varies by
+        # intent and over-constraining risks truncated fields.
+        kwargs["response_mime_type"] = "application/json"
+    return types.GenerateContentConfig(**kwargs)
+
+
+def call_llm_stream(
+    system_prompt: str,
+    user_prompt: str,
+    max_tokens: int = 1024,
+    *,
+    model_name: Optional[str] = None,
+    temperature: float = 0.1,
+    json_output: bool = False,
+):
+    """
+    Call Gemini LLM and yield response text chunks as they arrive.
+
+    Lets the caller start inspecting early fields (e.g. intent) while the
+    remainder of the response is still being generated.
+    """
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("LLM_API_KEY")
+    model_name = model_name or os.getenv("GEMINI_MODEL")
+
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY or LLM_API_KEY must be set in environment")
+
+    if not model_name:
+        raise RuntimeError("GEMINI_MODEL must be set in environment")
+
+    try:
+        client = _get_client(api_key)
+
+        stream = client.models.generate_content_stream(
+            model=model_name,
+            contents=user_prompt,
+            config=_build_config(system_prompt, temperature, max_tokens, json_output),
+        )
+        for chunk in stream:
+            text = getattr(chunk, "text", None)
+            if text:
+                yield text
+    except Exception as e:
+        raise RuntimeError(f"Gemini API error: {str(e)}")
+
+
+async def acall_llm(
+    system_prompt: str,
+    user_prompt: str,
+    max_tokens: int = 1024,
+    *,
+    model_name: Optional[str] = None,
+    temperature: float = 0.1,
+    json_output: bool = False,
+) -> str:
+    """
+    Async variant of call_llm using the SDK's client.aio interface.
+
+    Lets an event-loop caller await the Gemini round trip without tying up a
+    threadpool worker for the duration.
+    """
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("LLM_API_KEY")
+    model_name = model_name or os.getenv("GEMINI_MODEL")
+
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY or LLM_API_KEY must be set in environment")
+
+    if not model_name:
+        raise RuntimeError("GEMINI_MODEL must be set in environment")
+
+    try:
+        client = _get_client(api_key)
+
+        response = await client.aio.models.generate_content(
+            model=model_name,
+            contents=user_prompt,
+            config=_build_config(system_prompt, temperature, max_tokens, json_output),
+        )
+
+        result = getattr(response, "text", None)
+        if result:
+            return result
+        raise RuntimeError("Gemini returned empty response")
+
+    except Exception as e:
+        raise RuntimeError(f"Gemini API error: {str(e)}")
+
+
 def call_llm(
     system_prompt: str,
     user_prompt: str,
@@ -27,6 +145,7 @@ def call_llm(
     *,
     model_name: Optional[str] = None,
     temperature: float = 0.1,
+    json_output: bool = False,
 ) -> str:
     """
     Call Gemini LLM with system instruction and user prompt.
@@ -42,16 +161,12 @@ def call_llm(
         raise RuntimeError("GEMINI_MODEL must be set in environment")
 
     try:
-        client = genai.Client(api_key=api_key)
+        client = _get_client(api_key)
 
         response = client.models.generate_content(
             model=model_name,
             contents=user_prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                temperature=temperature,
-                max_output_tokens=max_tokens,
-            ),
+            config=_build_config(system_prompt, temperature, max_tokens, json_output),
         )
 
         # Prefer the SDK's convenience property
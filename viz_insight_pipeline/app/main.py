@@ -9,9 +9,9 @@ Consolidates all input parsing and data formatting:
 """
 
 import os
-import re
 import logging
 import sys
+import uuid
 from dotenv import load_dotenv, find_dotenv
 
 # Load environment variables from .env file (optional).
@@ -39,11 +39,14 @@ logger.info("Pipeline starting with LOG_LEVEL=%s", LOG_LEVEL)
 
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi import Request
-from fastapi.responses import HTMLResponse, Response
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse, Response
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 import httpx
+import orjson
 import io
 import pandas as pd
 
@@ -55,7 +58,26 @@ ROW_LIMIT = int(os.getenv("ROW_LIMIT", "5000"))
 ALLOWED_FILE_TYPES = os.getenv("ALLOWED_FILE_TYPES", ".csv").split(",")
 MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", "50"))
 
-app = FastAPI(title="Minimal Analysis Pipeline")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One shared HTTP client for the process: URL downloads reuse pooled
+    # (keep-alive) connections instead of paying TCP+TLS setup per request.
+    app.state.http = httpx.AsyncClient(
+        timeout=30.0,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+        if _PDF_BROWSER is not None:
+            # Close on the thread that owns the browser.
+            await asyncio.wrap_future(_PDF_EXECUTOR.submit(_shutdown_pdf_browser))
+
+
+# ORJSONResponse serializes in C (and handles numpy arrays natively), which
+# matters for large Plotly payloads like heatmap matrices.
+app = FastAPI(title="Minimal Analysis Pipeline", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 @app.get("/")
 def root():
@@ -71,9 +93,65 @@ def healthz():
 _PROFILE_REPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "runs", "profiles")
 
 
+# One Chromium instance for the process: launching the browser costs ~0.5-1s
+# and a whole process tree per PDF otherwise. Pages are per-request.
+#
+# Playwright's sync API is greenlet-bound to the thread that started it, and
+# FastAPI dispatches sync endpoints on arbitrary threadpool threads, so every
+# browser operation (start, launch, new_page, pdf, close) is routed through
+# this single-thread executor, which owns the browser. The single worker also
+# serializes access, so no extra lock is needed.
+_PDF_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-browser")
+_PDF_BROWSER = None
+_PDF_PLAYWRIGHT = None
+
+
+def _get_pdf_browser():
+    """Lazily start Playwright + headless Chromium. Runs on _PDF_EXECUTOR."""
+    global _PDF_BROWSER, _PDF_PLAYWRIGHT
+    if _PDF_BROWSER is None or not _PDF_BROWSER.is_connected():
+        from playwright.sync_api import sync_playwright  # type: ignore
+
+        if _PDF_PLAYWRIGHT is None:
+            _PDF_PLAYWRIGHT = sync_playwright().start()
+        _PDF_BROWSER = _PDF_PLAYWRIGHT.chromium.launch(headless=True)
+    return _PDF_BROWSER
+
+
+def _render_pdf(html: str) -> bytes:
+    """Print HTML to PDF bytes. Runs on _PDF_EXECUTOR."""
+    browser = _get_pdf_browser()
+    page = browser.new_page()
+    try:
+        page.set_content(html, wait_until="load")
+        return page.pdf(print_background=True, format="A4")
+    finally:
+        page.close()
+
+
+def _shutdown_pdf_browser():
+    """Close the browser and stop Playwright. Runs on _PDF_EXECUTOR."""
+    global _PDF_BROWSER, _PDF_PLAYWRIGHT
+    if _PDF_BROWSER is not None:
+        try:
+            _PDF_BROWSER.close()
+            _PDF_PLAYWRIGHT.stop()
+        except Exception:
+            logger.warning("PDF browser shutdown failed", exc_info=True)
+        _PDF_BROWSER = None
+        _PDF_PLAYWRIGHT = None
+
+
 def _is_safe_report_id(report_id: str) -> bool:
-    # UUID (we use uuid4) format
-    return bool(report_id) and bool(re.match(r"^[a-f0-9\-]{36}$", report_id))
+    # Canonical 36-char UUID form (we generate these), parsed rather than
+    # regex-matched; the length check rejects bare/braced hex up front.
+    if not report_id or len(report_id) != 36:
+        return False
+    try:
+        uuid.UUID(report_id)
+        return True
+    except ValueError:
+        return False
 
 
 @app.get("/profile/{report_id}", response_class=HTMLResponse)
@@ -82,7 +160,11 @@ def get_profile_report(report_id: str):
         raise HTTPException(status_code=400, detail="Invalid report_id")
 
     path = os.path.join(_PROFILE_REPORTS_DIR, f"{report_id}.html")
-    if not os.path.exists(path):
+    # One stat() instead of exists()+open(), and FileResponse streams the file
+    # (sendfile) rather than copying multi-MB HTML through a Python string.
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
         raise HTTPException(
             status_code=404,
             detail=(
@@ -91,13 +173,7 @@ def get_profile_report(report_id: str):
             ),
         )
 
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            html = f.read()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-    return HTMLResponse(content=html)
+    return FileResponse(path, media_type="text/html", stat_result=stat_result)
 
 
 @app.get("/profile/{report_id}/pdf")
@@ -111,12 +187,14 @@ def get_profile_report_pdf(report_id: str):
         raise HTTPException(status_code=400, detail="Invalid report_id")
 
     path = os.path.join(_PROFILE_REPORTS_DIR, f"{report_id}.html")
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="Report not found")
-
     try:
+        # Single open; no separate exists() check (TOCTOU + extra stat).
         with open(path, "r", encoding="utf-8") as f:
             html = f.read()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    try:
 
         pdf_bytes: bytes | None = None
 
@@ -127,14 +205,7 @@ def get_profile_report_pdf(report_id: str):
             pdf_engine = "auto"
 
         try:
-            from playwright.sync_api import sync_playwright  # type: ignore
-
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                page.set_content(html, wait_until="load")
-                pdf_bytes = page.pdf(print_background=True, format="A4")
-                browser.close()
+            pdf_bytes = _PDF_EXECUTOR.submit(_render_pdf, html).result()
             logger.info("PDF generated with Playwright report_id=%s bytes=%d", report_id, len(pdf_bytes))
         except Exception as e:
             logger.error("Playwright PDF generation failed", exc_info=True)
@@ -165,23 +236,73 @@ class FeedbackRequest(BaseModel):
     reward: int
 
 
+def _read_csv_limited(source) -> pd.DataFrame:
+    """Parse a CSV (file-like or bytes) into a row-limited DataFrame.
+
+    Uses pyarrow's vectorized CSV reader when it is installed (several times
+    faster than pandas' parser on large files); otherwise, or on any Arrow
+    parse error, falls back to pd.read_csv. pyarrow is optional because it has
+    no stable wheel on Python 3.14.
+    """
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pacsv
+    except Exception:
+        pa = None
+
+    if pa is not None:
+        try:
+            arrow_source = pa.BufferReader(source) if isinstance(source, (bytes, bytearray)) else source
+            # Incremental reader: stop pulling batches once ROW_LIMIT rows are
+            # in hand instead of parsing the whole file and slicing after.
+            reader = pacsv.open_csv(arrow_source, read_options=pacsv.ReadOptions(block_size=1 << 20))
+            batches = []
+            rows = 0
+            for batch in reader:
+                batches.append(batch)
+                rows += batch.num_rows
+                if rows >= ROW_LIMIT:
+                    break
+            tbl = pa.Table.from_batches(batches, schema=reader.schema)
+            return tbl.slice(0, ROW_LIMIT).to_pandas()
+        except Exception:
+            logger.warning("pyarrow CSV parse failed; falling back to pandas", exc_info=True)
+            if hasattr(source, "seek"):
+                source.seek(0)
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    # nrows lets the C parser stop after ROW_LIMIT lines instead of parsing
+    # the full file and discarding the tail with .head().
+    return pd.read_csv(source, nrows=ROW_LIMIT)
+
+
 def _load_csv_from_file(file: UploadFile) -> pd.DataFrame:
     """Load a single uploaded file into a DataFrame with row limit."""
-    df = pd.read_csv(file.file)
-    if len(df) > ROW_LIMIT:
-        df = df.head(ROW_LIMIT)
-    return df
+    return _read_csv_limited(file.file)
 
 
 async def _load_csv_from_url(url: str, client: httpx.AsyncClient) -> Optional[pd.DataFrame]:
-    """Download and load a CSV from URL into a DataFrame with row limit."""
+    """Download and load a CSV from URL into a DataFrame with row limit.
+
+    Streams the body in 64 KiB chunks so an oversized file is rejected at
+    MAX_FILE_SIZE_MB instead of after a full buffered download, and other
+    coroutines get the loop between chunks.
+    """
+    max_bytes = MAX_FILE_SIZE_MB * (1 << 20)
     try:
-        response = await client.get(url)
-        response.raise_for_status()
-        df = pd.read_csv(io.BytesIO(response.content))
-        if len(df) > ROW_LIMIT:
-            df = df.head(ROW_LIMIT)
-        return df
+        buf = io.BytesIO()
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(1 << 16):
+                buf.write(chunk)
+                if buf.tell() > max_bytes:
+                    logger.warning("CSV download exceeds %dMB, skipping url=%s", MAX_FILE_SIZE_MB, url)
+                    return None
+        buf.seek(0)
+        # Parse on the threadpool so the CPU-bound parse doesn't stall other
+        # coroutines (pandas/pyarrow release the GIL in their C parsers).
+        return await asyncio.to_thread(_read_csv_limited, buf)
     except Exception:
         return None
 
@@ -205,11 +326,15 @@ def _parse_datasets(ctx: Dict[str, Any]) -> List[str]:
 
 
 def _parse_history(ctx: Dict[str, Any]) -> str:
-    """Extract and format conversation history from context as a string summary."""
+    """Extract and format conversation history from context as a string summary.
+
+    Messages without content are dropped rather than contributing blank lines
+    — every line here becomes prompt tokens sent to Gemini.
+    """
     if not ctx or "messages" not in ctx:
         return ""
     return "\n".join(
-        m.get("content", "") for m in ctx["messages"]
+        content for m in ctx["messages"] if (content := m.get("content"))
     )
 
 
@@ -233,12 +358,12 @@ async def analyze_endpoint(
     )
     # 1) Keep user_text as string (already a string from Form)
     
-    # 2) Parse the JSON context
+    # 2) Parse the JSON context (orjson: C parser, same error contract)
     ctx: Dict[str, Any] = {}
     if context:
         try:
-            ctx = json.loads(context)
-        except json.JSONDecodeError as e:
+            ctx = orjson.loads(context)
+        except orjson.JSONDecodeError as e:
             raise HTTPException(status_code=400, detail=f"context must be valid JSON: {e}")
 
     # 3) Parse datasets from context
@@ -259,24 +384,33 @@ async def analyze_endpoint(
     # 6) Load CSV files into DataFrames
     dfs: Dict[str, pd.DataFrame] = {}
 
-    # Load directly uploaded files
+    # Load directly uploaded files on the threadpool: CSV parsing is CPU-heavy
+    # (and releases the GIL in the C parser), so keep it off the event loop
+    # and parse multiple uploads in parallel.
     if has_files:
         try:
-            for f in files:
+            parsed = await asyncio.gather(
+                *(asyncio.to_thread(_load_csv_from_file, f) for f in files)
+            )
+            for f, df in zip(files, parsed):
                 name = getattr(f, "filename", "uploaded.csv")
-                dfs[name] = _load_csv_from_file(f)
+                dfs[name] = df
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Error reading uploaded CSV files: {e}")
 
-    # Download and load files from URLs
+    # Download and load files from URLs concurrently: independent downloads,
+    # so total wall time is the slowest one rather than the sum.
     if has_urls:
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                for idx, url in enumerate(dataset_urls):
-                    df = await _load_csv_from_url(url, client)
-                    if df is not None:
-                        filename = _extract_filename_from_url(url, idx)
-                        dfs[filename] = df
+            client = request.app.state.http
+            results = await asyncio.gather(
+                *(_load_csv_from_url(url, client) for url in dataset_urls),
+                return_exceptions=True,
+            )
+            for idx, (url, df) in enumerate(zip(dataset_urls, results)):
+                if isinstance(df, pd.DataFrame):
+                    filename = _extract_filename_from_url(url, idx)
+                    dfs[filename] = df
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Error loading CSV from URL: {e}")
 
@@ -298,9 +432,12 @@ async def analyze_endpoint(
         logger.info("analyze: Using arm config from backend arm_id=%s temp=%s model=%s",
                     arm_id, arm_config["temperature"], arm_config["model_name"])
 
-    # 9) Call analyzer with processed data and arm config
+    # 9) Call analyzer with processed data and arm config. analyze() is
+    # synchronous (LLM round trip + code execution), so run it on a worker
+    # thread to keep the event loop free for other requests.
     try:
-        result = analyze(
+        result = await asyncio.to_thread(
+            analyze,
             user_text=user_text,
             dfs=dfs,
             history_summary=history_summary,
@@ -357,6 +494,6 @@ def feedback_endpoint(request: Request, req: FeedbackRequest):
         "feedback.updated session_id=%s arm_id=%s new_stats=%s",
         session_id,
         req.arm_id,
-        json.dumps(new_stats, ensure_ascii=False) if new_stats else None,
+        orjson.dumps(new_stats).decode() if new_stats else None,
     )
     return {"status": "success", "arm_id": req.arm_id, "reward": req.reward, "new_stats": new_stats}
@@ -1,16 +1,21 @@
+import atexit
 import json
 import os
 import logging
-from dataclasses import dataclass, asdict
-from typing import Dict, List
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
 
+import msgpack
 import numpy as np
+import orjson
 
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class Arm:
     arm_id: str
     stage: str  # e.g. "unified"
@@ -19,33 +24,93 @@ class Arm:
     temperature: float = 0.1
 
 
-@dataclass
+@dataclass(slots=True)
 class ArmStats:
     alpha: float = 1.0  # successes
     beta: float = 1.0   # failures
     pulls: int = 0
 
 
+# Debounce parameters for state persistence: a write goes to disk when this
+# many updates are pending or this much time has passed since the last flush,
+# whichever comes first. Amortizes per-pull full-file rewrites.
+_FLUSH_THRESHOLD = 16
+_FLUSH_INTERVAL_S = 0.2
+
+# Candidate count below which choose() samples with scalar draws and builtin
+# max; NumPy's vectorized path only pays off past this size.
+_ARGMAX_VECTOR_MIN = 16
+
+
+def _fmt_samples(ids, samples) -> str:
+    """Compact `{arm:0.1234,...}` rendering for the choose() log line."""
+    return "{" + ",".join(f"{k}:{v:.4g}" for k, v in zip(ids, samples)) + "}"
+
+
 class ThompsonBandit:
     def __init__(self, state_path: str):
         self.state_path = state_path
-        self._stats: Dict[str, ArmStats] = {}
+        # Structure-of-arrays arm state: contiguous per-field buffers indexed
+        # by `_arm_index[arm_id]`. choose() slices these directly into the
+        # Beta draw (no per-arm object gather) and update() is a scalar write.
+        # Arrays are over-allocated; `len(self._arm_index)` is the live count.
+        self._arm_index: Dict[str, int] = {}
+        self._alphas = np.ones(8, dtype=np.float64)
+        self._betas = np.ones(8, dtype=np.float64)
+        self._pulls = np.zeros(8, dtype=np.int64)
+        self._dirty = False
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._save_lock = threading.Lock()
+        # Memoized choose() inputs keyed by (stage, arm-id tuple): the
+        # filtered candidate list and its row-index vector. Content keys mean
+        # callers that rebuild an equal arms list per call still hit the same
+        # entry instead of growing the cache per list object.
+        self._stage_cache: Dict[tuple, tuple] = {}
+        # Memoized get_stats_snapshot() result; dropped on any stat mutation.
+        self._snapshot_cache: Optional[Dict[str, Dict[str, float]]] = None
+        # PCG64 Generator instead of the lock-guarded legacy global RandomState.
+        self._rng = np.random.default_rng()
         self._load()
+        atexit.register(self.flush)
+
+    def _add_arm(self, arm_id: str, alpha: float = 1.0, beta: float = 1.0, pulls: int = 0) -> int:
+        i = len(self._arm_index)
+        if i >= len(self._alphas):
+            cap = len(self._alphas) * 2
+            self._alphas = np.resize(self._alphas, cap)
+            self._betas = np.resize(self._betas, cap)
+            self._pulls = np.resize(self._pulls, cap)
+        self._alphas[i] = alpha
+        self._betas[i] = beta
+        self._pulls[i] = pulls
+        self._arm_index[arm_id] = i
+        self._snapshot_cache = None
+        return i
 
     def _load(self):
         if os.path.exists(self.state_path):
             try:
-                with open(self.state_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                for arm_id, stat_obj in data.get("arms", {}).items():
-                    self._stats[arm_id] = ArmStats(**stat_obj)
+                with open(self.state_path, "rb") as f:
+                    raw = f.read()
+                if raw[:1] == b"{":
+                    # Legacy JSON state (dict-of-dicts); migrated to msgpack on
+                    # the next save.
+                    data = orjson.loads(raw)
+                    for arm_id, stat_obj in data.get("arms", {}).items():
+                        s = ArmStats(**stat_obj)
+                        self._add_arm(arm_id, s.alpha, s.beta, s.pulls)
+                else:
+                    data = msgpack.unpackb(raw)
+                    for arm_id, tup in data.get("arms", {}).items():
+                        self._add_arm(arm_id, *tup)
                 logger.info(
                     "bandit.state_loaded path=%s arms=%d",
                     self.state_path,
-                    len(self._stats),
+                    len(self._arm_index),
                 )
             except Exception:
-                self._stats = {}
+                self._arm_index = {}
                 logger.warning(
                     "bandit.state_load_failed path=%s",
                     self.state_path,
@@ -55,85 +120,169 @@ class ThompsonBandit:
             logger.info("bandit.state_missing path=%s", self.state_path)
 
     def _save(self):
-        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
-        data = {"arms": {k: asdict(v) for k, v in self._stats.items()}}
-        with open(self.state_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        with self._save_lock:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            # Fixed-order tuples, binary encoding: no repeated field names and
+            # no text formatting on the hot save path.
+            data = {
+                "arms": {
+                    k: (float(self._alphas[i]), float(self._betas[i]), int(self._pulls[i]))
+                    for k, i in self._arm_index.items()
+                }
+            }
+            # Write-to-temp + rename so a crash mid-write never leaves a
+            # truncated state file behind.
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(msgpack.packb(data))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.state_path)
+            self._dirty = False
+            self._pending = 0
+            self._last_flush = time.monotonic()
         logger.debug(
             "bandit.state_saved path=%s arms=%d",
             self.state_path,
-            len(self._stats),
+            len(self._arm_index),
         )
 
+    def _mark_dirty(self):
+        """Record a pending mutation; persist only when the debounce trips."""
+        self._dirty = True
+        self._pending += 1
+        if (
+            self._pending >= _FLUSH_THRESHOLD
+            or (time.monotonic() - self._last_flush) > _FLUSH_INTERVAL_S
+        ):
+            self._save()
+
+    def flush(self):
+        """Persist any pending state immediately (shutdown / critical updates)."""
+        if self._dirty:
+            self._save()
+
+    def _stats_dict(self, i: int) -> Dict[str, float]:
+        return {
+            "alpha": float(self._alphas[i]),
+            "beta": float(self._betas[i]),
+            "pulls": int(self._pulls[i]),
+        }
+
     def get_stats_snapshot(self) -> Dict[str, Dict[str, float]]:
-        return {k: asdict(v) for k, v in self._stats.items()}
+        # Rebuilt only after a mutation; repeated polls between updates are
+        # O(1). Callers treat the snapshot as read-only.
+        if self._snapshot_cache is None:
+            self._snapshot_cache = {
+                k: self._stats_dict(i) for k, i in self._arm_index.items()
+            }
+        return self._snapshot_cache
 
     def get_arm_stats(self, arm_id: str):
-        s = self._stats.get(arm_id)
-        return asdict(s) if s else None
+        i = self._arm_index.get(arm_id)
+        return self._stats_dict(i) if i is not None else None
 
     def ensure_arms(self, arms: List[Arm]):
         added = 0
         for arm in arms:
-            if arm.arm_id not in self._stats:
-                self._stats[arm.arm_id] = ArmStats()
+            if arm.arm_id not in self._arm_index:
+                self._add_arm(arm.arm_id)
                 added += 1
-        self._save()
+        # Steady-state requests re-declare the same arms; only a genuinely
+        # new arm needs a cache invalidation and a durable write.
         if added:
+            self._stage_cache.clear()
+            self._mark_dirty()
+            # New arms must be durable before feedback can reference them.
+            self.flush()
             logger.info(
                 "bandit.ensure_arms_added path=%s added=%d total=%d",
                 self.state_path,
                 added,
-                len(self._stats),
+                len(self._arm_index),
             )
 
     def choose(self, stage: str, arms: List[Arm]) -> Arm:
-        candidates = [a for a in arms if a.stage == stage]
-        if not candidates:
-            raise ValueError(f"No arms found for stage {stage}")
-
-        samples = []
-        sample_map = {}
-        for arm in candidates:
-            stats = self._stats.get(arm.arm_id) or ArmStats()
-            sample = np.random.beta(stats.alpha, stats.beta)
-            samples.append(sample)
-            sample_map[arm.arm_id] = float(sample)
-
-        best_idx = int(np.argmax(samples))
+        # analyze() passes an equal arms list every request, so the stage
+        # filter and index gather are cached after the first call.
+        cache_key = (stage, tuple(a.arm_id for a in arms))
+        cached = self._stage_cache.get(cache_key)
+        if cached is not None:
+            candidates, idx = cached
+        else:
+            candidates = [a for a in arms if a.stage == stage]
+            if not candidates:
+                raise ValueError(f"No arms found for stage {stage}")
+            for a in candidates:
+                if a.arm_id not in self._arm_index:
+                    self._add_arm(a.arm_id)
+            idx = np.fromiter(
+                (self._arm_index[a.arm_id] for a in candidates),
+                dtype=np.intp,
+                count=len(candidates),
+            )
+            self._stage_cache[cache_key] = (candidates, idx)
+
+        # Beta(a, b) via the gamma ratio Ga/(Ga+Gb). For the handful of arms
+        # a stage typically has, scalar draws plus builtin max beat the
+        # ndarray fancy-index/argmax machinery; the vectorized path only wins
+        # once K grows past the dispatch overhead.
+        n = len(candidates)
+        gamma = self._rng.standard_gamma
+        if n < _ARGMAX_VECTOR_MIN:
+            alphas = self._alphas
+            betas = self._betas
+            samples = []
+            for i in idx:
+                ga = gamma(alphas[i])
+                gb = gamma(betas[i])
+                samples.append(ga / (ga + gb))
+            best_idx = max(range(n), key=samples.__getitem__)
+        else:
+            ga = gamma(self._alphas[idx])
+            gb = gamma(self._betas[idx])
+            samples = (ga / (ga + gb)).tolist()
+            best_idx = max(range(n), key=samples.__getitem__)
+
         chosen = candidates[best_idx]
-        chosen_stats = self._stats.get(chosen.arm_id)
-        logger.info(
-            "bandit.choose stage=%s arm_id=%s alpha=%.1f beta=%.1f pulls=%d samples=%s",
-            stage,
-            chosen.arm_id,
-            float(chosen_stats.alpha) if chosen_stats else 1.0,
-            float(chosen_stats.beta) if chosen_stats else 1.0,
-            int(chosen_stats.pulls) if chosen_stats else 0,
-            json.dumps(sample_map, ensure_ascii=False),
-        )
+        # The per-arm sample string exists only for this log line; skip
+        # building it when INFO is off.
+        if logger.isEnabledFor(logging.INFO):
+            i = int(idx[best_idx])
+            logger.info(
+                "bandit.choose stage=%s arm_id=%s alpha=%.1f beta=%.1f pulls=%d samples=%s",
+                stage,
+                chosen.arm_id,
+                float(self._alphas[i]),
+                float(self._betas[i]),
+                int(self._pulls[i]),
+                _fmt_samples((a.arm_id for a in candidates), samples),
+            )
         return chosen
 
     def update(self, arm_id: str, reward: int):
-        if arm_id not in self._stats:
+        i = self._arm_index.get(arm_id)
+        if i is None:
             logger.warning("bandit.update_unknown_arm arm_id=%s reward=%s", arm_id, reward)
             return None
 
-        stats = self._stats[arm_id]
-        before = asdict(stats)
-        stats.pulls += 1
+        log_update = logger.isEnabledFor(logging.INFO)
+        before = self._stats_dict(i) if log_update else None
+        self._pulls[i] += 1
         if reward == 1:
-            stats.alpha += 1
+            self._alphas[i] += 1
         else:
-            stats.beta += 1
-
-        self._save()
-        after = asdict(stats)
-        logger.info(
-            "bandit.update arm_id=%s reward=%d before=%s after=%s",
-            arm_id,
-            int(reward),
-            json.dumps(before, ensure_ascii=False),
-            json.dumps(after, ensure_ascii=False),
-        )
+            self._betas[i] += 1
+
+        self._snapshot_cache = None
+        self._mark_dirty()
+        after = self._stats_dict(i)
+        if log_update:
+            logger.info(
+                "bandit.update arm_id=%s reward=%d before=%s after=%s",
+                arm_id,
+                int(reward),
+                json.dumps(before, ensure_ascii=False),
+                json.dumps(after, ensure_ascii=False),
+            )
         return after
@@ -7,10 +7,16 @@ Rationale:
 """
 
 from typing import Dict, List, Optional, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class AnalysisResponse(BaseModel):
+    # Analyzer results carry internal keys (e.g. execution metadata) beyond
+    # this contract. Pydantic v2 already ignores extras by default; this
+    # config just pins that behavior explicitly so a future model_config
+    # edit cannot silently start storing them.
+    model_config = ConfigDict(extra="ignore")
+
     intent: Optional[str] = None
     dataset_name: Optional[str] = None
     graph_type: Optional[str] = None
@@ -0,0 +1,26 @@
+import numpy as np
+
+from app import analyzer as analyzer_mod
+
+
+def test_heatmap_z_serializes_to_nested_lists():
+    # Dropping all-NaN rows/columns slices the matrix into a non-contiguous
+    # view; the serialized z must still come out as nested lists, not a
+    # stringified numpy repr.
+    arr = np.array([
+        [1.0, 0.5, np.nan],
+        [0.2, 0.9, np.nan],
+        [np.nan, np.nan, np.nan],
+    ])
+
+    cleaned, keep_row, keep_col, zmin, zmax = analyzer_mod._heatmap_clean(arr)
+    z = analyzer_mod._safe_serialize(cleaned)
+
+    assert z == [[1.0, 0.5], [0.2, 0.9]]
+    assert all(isinstance(row, list) for row in z)
+    assert zmin == 0.2 and zmax == 1.0
+
+
+def test_safe_serialize_nan_becomes_null():
+    out = analyzer_mod._safe_serialize({"z": np.array([1.0, np.nan])})
+    assert out == {"z": [1.0, None]}